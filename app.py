@@ -4,28 +4,109 @@ High Court Cause List API
 Flask application that provides API access to court cause list data.
 """
 
-import subprocess
+import ahocorasick
 import fitz  # PyMuPDF
 import sys
 import os
+import re
+import multiprocessing
+import shutil
+import subprocess
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, wraps
 
+import orjson
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
 from flask import Flask, request, jsonify
+from flask.json.provider import JSONProvider
 from werkzeug.exceptions import BadRequest, Unauthorized
 
+class ORJSONProvider(JSONProvider):
+    """JSON provider that (de)serializes with orjson instead of the stdlib json."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 
 # Configuration
 API_KEY = os.environ.get('API_KEY', 'your-secret-api-key-here')
 DEFAULT_BASE_URL = "https://www.calcuttahighcourt.gov.in"
 DEFAULT_Y_TOLERANCE = 3
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', '16'))
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', '10'))
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', str(min(8, os.cpu_count() or 1))))
+PARALLEL_MIN_PAGES = 32
+PDF_CACHE_SIZE = 64
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 30  # seconds for the whole download
+MAX_PDF_BYTES = 64 * 1024 * 1024  # refuse larger downloads
+NEG_CACHE_TTL = 3600  # seconds to remember dates with no cause list
+BLOCK_CACHE_SIZE = 16
+MATCHER_CACHE_SIZE = 256
+# Probe pages with Poppler's pdftotext and only run PyMuPDF on pages that
+# contain every name token; set USE_PDFTOTEXT=false to always parse all pages.
+USE_PDFTOTEXT = (os.environ.get('USE_PDFTOTEXT', 'true').lower() == 'true'
+                 and shutil.which("pdftotext") is not None)
+
+# Positioned text only: ligatures are expanded (no PRESERVE_LIGATURES) and
+# image blocks are left out (no PRESERVE_IMAGES).
+TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+
+# Fixed-width DDMMYYYY; cheaper than datetime.strptime on the request path
+DATE_RE = re.compile(r"(\d{2})(\d{2})(\d{4})", re.ASCII)
 
 SIDE_INFO = {
     "Original Side": ("OS", "clo"),
     "Appellate Side": ("AS", "cla"),
 }
 
+# Shared HTTP session so repeated downloads reuse the TCP/TLS connection
+# to the court website instead of paying a fresh handshake per request.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+SESSION = requests.Session()
+SESSION.verify = False
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+# Download slots: requests for different dates download in parallel, but the
+# court website never sees more than FETCH_WORKERS at once. Only the download
+# itself holds a slot, so cache hits never queue behind slow fetches.
+_fetch_slots = threading.BoundedSemaphore(FETCH_WORKERS)
+
+# Per-PDF page texts and parsed text blocks, most recently used last. Keyed on
+# the PDF bytes themselves: bytes cache their hash, and fetch_pdf_bytes hands
+# back the same object on a cache hit, so lookups don't rehash the document.
+# Only PDFs from DEFAULT_BASE_URL are stored (see fetch_pdf_bytes).
+_block_cache = OrderedDict()
+_block_cache_lock = threading.Lock()
+
+# (date, side, base_url) -> time.monotonic() of the last non-PDF response, so
+# weekends/holidays don't cost a round trip to the court site on every call.
+_neg_cache = {}
+_neg_cache_lock = threading.Lock()
+
+# PyMuPDF is not thread-safe and holds the GIL, so large PDFs are split
+# across worker processes; created on first use.
+_parse_executor = None
+_parse_executor_lock = threading.Lock()
+
 def require_api_key(f):
     """Decorator to require API key authentication."""
     @wraps(f)
@@ -47,69 +128,317 @@ def require_api_key(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def _download(url):
+    """
+    Stream url into a buffer preallocated from its Content-Length.
+
+    The announced length is untrusted (base_url may point anywhere), so the
+    preallocation and the body are both capped at MAX_PDF_BYTES. requests'
+    timeout only bounds each socket read, so the whole body is also held to
+    a DOWNLOAD_TIMEOUT deadline.
+    """
+    deadline = time.monotonic() + DOWNLOAD_TIMEOUT
+    with SESSION.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT, allow_redirects=True) as resp:
+        size = min(int(resp.headers.get('content-length') or 0), MAX_PDF_BYTES)
+        buf = bytearray(size)
+        off = 0
+        while True:
+            if time.monotonic() > deadline:
+                raise requests.Timeout("PDF download timeout")
+            # read1 returns what has arrived instead of waiting for a full
+            # chunk, so a server that trickles bytes can't outlast the deadline
+            chunk = resp.raw.read1(DOWNLOAD_CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                break
+            end = off + len(chunk)
+            if end > MAX_PDF_BYTES:
+                raise requests.RequestException(f"response exceeds {MAX_PDF_BYTES} bytes")
+            if end <= size:
+                buf[off:end] = chunk  # same-length slice: in-place copy
+            else:
+                buf[off:] = chunk     # missing/understated length: grow
+            off = end
+        del buf[off:]
+    return bytes(buf)
+
 def fetch_pdf_bytes(date_str, side, base_url=DEFAULT_BASE_URL):
-    """Fetch PDF bytes from the court website."""
+    """
+    Fetch PDF bytes from the court website. Only DEFAULT_BASE_URL downloads
+    are cached: base_url comes from the client, and caching arbitrary hosts
+    would let one fill memory with PDF_CACHE_SIZE blobs of MAX_PDF_BYTES.
+    """
+    if base_url == DEFAULT_BASE_URL:
+        return _fetch_court_pdf(date_str, side)
+    return _fetch_pdf(date_str, side, base_url)
+
+@lru_cache(maxsize=PDF_CACHE_SIZE)
+def _fetch_court_pdf(date_str, side):
+    """Fetch a PDF from DEFAULT_BASE_URL (cached per date/side)."""
+    return _fetch_pdf(date_str, side, DEFAULT_BASE_URL)
+
+def _fetch_pdf(date_str, side, base_url):
+    """Download and validate one cause list PDF, honouring the negative cache."""
     if side not in SIDE_INFO:
         raise ValueError(f"Invalid side '{side}'. Must be one of: {list(SIDE_INFO.keys())}")
 
+    key = (date_str, side, base_url)
+    with _neg_cache_lock:
+        failed_at = _neg_cache.get(key)
+    if failed_at is not None and time.monotonic() - failed_at < NEG_CACHE_TTL:
+        raise Exception("Unable to fetch cause_list details due to weekends or failed to fetch cause list")
+
     code, prefix = SIDE_INFO[side]
     url = f"{base_url}/downloads/old_cause_lists/{code}/{prefix}{date_str}.pdf"
 
     try:
-        data = subprocess.check_output(
-            ["curl", "--insecure", "-L", url],
-            stderr=subprocess.DEVNULL,
-            timeout=30
-        )
-    except subprocess.CalledProcessError as e:
-        raise Exception(f"Failed to download PDF: {e}")
-    except subprocess.TimeoutExpired:
+        with _fetch_slots:
+            data = _download(url)
+    except requests.Timeout:
         raise Exception("PDF download timeout")
+    except requests.RequestException as e:
+        raise Exception(f"Failed to download PDF: {e}")
 
     if not data.startswith(b"%PDF"):
+        now = time.monotonic()
+        with _neg_cache_lock:
+            for stale in [k for k, t in _neg_cache.items() if now - t >= NEG_CACHE_TTL]:
+                del _neg_cache[stale]
+            _neg_cache[key] = now
         raise Exception("Unable to fetch cause_list details due to weekends or failed to fetch cause list")
 
     return data
 
-def extract_rows_from_bytes(pdf_bytes, lawyer, tol=DEFAULT_Y_TOLERANCE):
-    """Extract relevant rows from PDF bytes containing the lawyer's name."""
-    tokens = [w.lower() for w in lawyer.split()]
+def _get_parse_executor():
+    """Return the shared process pool for page extraction."""
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            # spawn, not fork: the server process is multi-threaded
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_executor
+
+def _discard_parse_executor(executor):
+    """Drop a broken process pool so the next caller starts a fresh one."""
+    global _parse_executor
+    with _parse_executor_lock:
+        # Another thread may already have replaced it
+        if _parse_executor is executor:
+            _parse_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _split_blocks(raw):
+    """
+    Turn get_text("blocks") output into [(x0, y0, x1, y1, lines), ...], with
+    each block's lines stripped at the ends (inner spacing is kept as printed)
+    and empty ones dropped.
+    """
+    return [(b[0], b[1], b[2], b[3], tuple([ln for ln in map(str.strip, b[4].splitlines()) if ln]))
+            for b in raw]
+
+def _extract_page_blocks(pdf_bytes, page_indices):
+    """Return the text blocks of the given pages as split by _split_blocks."""
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [_split_blocks(doc.load_page(i).get_text("blocks", flags=TEXT_FLAGS, sort=False))
+                for i in page_indices]
+    finally:
+        doc.close()
+
+def _extract_blocks(pdf_bytes, page_indices):
+    """Return the text blocks of the given pages, in parallel for many pages."""
+    if PARSE_WORKERS <= 1 or len(page_indices) < PARALLEL_MIN_PAGES:
+        return _extract_page_blocks(pdf_bytes, page_indices)
+
+    step = -(-len(page_indices) // PARSE_WORKERS)
+    executor = _get_parse_executor()
+    try:
+        futures = [executor.submit(_extract_page_blocks, pdf_bytes, page_indices[i:i + step])
+                   for i in range(0, len(page_indices), step)]
+        return [blocks for future in futures for blocks in future.result()]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory): parse this PDF in-process
+        # rather than failing every large PDF until the server restarts
+        _discard_parse_executor(executor)
+        return _extract_page_blocks(pdf_bytes, page_indices)
+
+def _pdftotext_pages(pdf_bytes, page_count):
+    """
+    Return the lowercased text of every page as extracted by pdftotext, or
+    None when it is disabled, fails or disagrees with PyMuPDF on page count.
+    """
+    if not USE_PDFTOTEXT:
+        return None
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", "-", "-"],
+            input=pdf_bytes, capture_output=True, timeout=60, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    # Every page is terminated by a form feed
+    texts = result.stdout.decode("utf-8", "replace").lower().split("\f")[:-1]
+    return texts if len(texts) == page_count else None
+
+def _index_page(page_num, grouped):
+    """
+    Build the cached form of one page from its _split_blocks blocks:
+    (page_num, blocks, order, sorted_midys, page_lower, starts) where blocks
+    is [(x0, y0, x1, y1, text_lower, lines), ...], order lists block indices
+    by vertical midpoint, sorted_midys holds those midpoints in that order,
+    page_lower is every text_lower joined by newlines and starts gives the
+    offset of each block within page_lower.
+    """
+    blocks = [(b[0], b[1], b[2], b[3], "\n".join(b[4]).lower(), b[4]) for b in grouped]
+    midys = [(b[1] + b[3]) / 2 for b in blocks]
+    order = sorted(range(len(blocks)), key=midys.__getitem__)
+    sorted_midys = [midys[i] for i in order]
+    page_lower = "\n".join([b[4] for b in blocks])
+    starts = []
+    offset = 0
+    for b in blocks:
+        starts.append(offset)
+        offset += len(b[4]) + 1
+    return (page_num, blocks, order, sorted_midys, page_lower, starts)
+
+def _pdf_entry(pdf_bytes, cache=True):
+    """
+    Return the cache entry for a PDF, creating it on a miss:
+    {"texts": pdftotext page texts or None, "pages": [indexed page or None]}.
+    With cache=False a miss builds a fresh entry without storing it.
+    """
+    with _block_cache_lock:
+        entry = _block_cache.get(pdf_bytes)
+        if entry is not None:
+            _block_cache.move_to_end(pdf_bytes)
+            return entry
+
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    page_count = doc.page_count
+    doc.close()
+    entry = {"texts": _pdftotext_pages(pdf_bytes, page_count), "pages": [None] * page_count}
+    if not cache:
+        return entry
+
+    with _block_cache_lock:
+        entry = _block_cache.setdefault(pdf_bytes, entry)
+        _block_cache.move_to_end(pdf_bytes)
+        while len(_block_cache) > BLOCK_CACHE_SIZE:
+            _block_cache.popitem(last=False)
+    return entry
+
+def _parse_blocks(pdf_bytes, entry, page_indices):
+    """Return the indexed pages for page_indices, parsing only uncached ones."""
+    pages = entry["pages"]
+    missing = [i for i in page_indices if pages[i] is None]
+    if missing:
+        # Concurrent requests may parse the same page twice; either result
+        # is identical, so the unlocked list assignment is harmless.
+        for i, grouped in zip(missing, _extract_blocks(pdf_bytes, missing)):
+            pages[i] = _index_page(i + 1, grouped)
+    return [pages[i] for i in page_indices]
+
+def _build_automaton(tokens):
+    """Compile the name tokens into an Aho-Corasick automaton (value = token bit)."""
+    automaton = ahocorasick.Automaton()
+    for bit, tok in enumerate(tokens):
+        automaton.add_word(tok, 1 << bit)
+    automaton.make_automaton()
+    return automaton
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _make_matcher(lawyer_lower):
+    """
+    Return (token_count, automaton) for a lowercased, space-normalised
+    advocate name, or (0, None) if it has no tokens. Cached per name.
+    """
+    tokens = set(lawyer_lower.split())
+    if not tokens:
+        return 0, None
+    return len(tokens), _build_automaton(tokens)
+
+def _token_mask(automaton, text):
+    """OR together the bits of every token occurring in text."""
+    mask = 0
+    for _, bit in automaton.iter(text):
+        mask |= bit
+    return mask
+
+def _token_masks(automaton, page_lower, starts):
+    """
+    Scan a page's text once and return (page_mask, block_masks), the OR of
+    the bits of the tokens found on the page and within each block.
+    """
+    masks = [0] * len(starts)
+    page_mask = 0
+    for end, bit in automaton.iter(page_lower):
+        # Tokens hold no whitespace, so a hit never crosses a block boundary
+        masks[bisect_right(starts, end) - 1] |= bit
+        page_mask |= bit
+    return page_mask, masks
+
+def extract_rows_from_bytes(pdf_bytes, lawyer, tol=DEFAULT_Y_TOLERANCE, cache=True):
+    """
+    Extract relevant rows from PDF bytes containing the lawyer's name.
+    cache=False keeps the PDF's parsed pages out of the block cache.
+    """
+    token_count, automaton = _make_matcher(" ".join(lawyer.lower().split()))
+    if automaton is None:
+        return []
+    full = (1 << token_count) - 1
     seen = set()
     out = []
 
-    for page in doc:
-        raw = page.get_text("blocks")
-        blocks = [(b[0], b[1], b[2], b[3], b[4]) for b in raw]
-
-        for x0, y0, x1, y1, text in blocks:
-            lower = text.lower()
-            if any(tok in lower for tok in tokens):
+    entry = _pdf_entry(pdf_bytes, cache)
+    if entry["texts"] is None:
+        candidates = list(range(len(entry["pages"])))
+    else:
+        candidates = [i for i, text in enumerate(entry["texts"])
+                      if _token_mask(automaton, text) == full]
+
+    pages = _parse_blocks(pdf_bytes, entry, candidates)
+    for page_num, blocks, order, sorted_midys, page_lower, starts in pages:
+        # One pass over the page gives every block's token bitmask; a band
+        # holds every token iff its masks OR to `full`. A band never spans
+        # pages, so skip pages that lack any of the tokens.
+        page_mask, masks = _token_masks(automaton, page_lower, starts)
+        if page_mask != full:
+            continue
+
+        # Bands are contiguous slices of the cached midpoint order, found by
+        # bisection instead of a scan of the page.
+        # Seeds that select the same slice of the midpoint order produce the
+        # same band, so collect each distinct (lo, hi) once, in seed order,
+        # then check and emit every band a single time.
+        bands = {}
+        for idx, (x0, y0, x1, y1, _, _) in enumerate(blocks):
+            if masks[idx]:
                 height = y1 - y0
                 top = y0 - tol
                 bottom = y1 + height + tol
+                bands[(bisect_left(sorted_midys, top), bisect_right(sorted_midys, bottom))] = None
+
+        for lo, hi in bands:
+            hit = 0
+            for i in order[lo:hi]:
+                hit |= masks[i]
+                if hit == full:
+                    break
+            if hit != full:
+                continue
+
+            band_ids = sorted(order[lo:hi], key=lambda i: (blocks[i][0], i))
+            lines = []
+            for i in band_ids:
+                lines.extend(blocks[i][5])
+            key = (page_num, tuple(lines))
+            if key not in seen:
+                seen.add(key)
+                out.append((page_num, lines))
 
-                band = []
-                for bx0, by0, bx1, by1, btext in blocks:
-                    midy = (by0 + by1) / 2
-                    if top <= midy <= bottom:
-                        band.append((bx0, by0, by1, btext))
-
-                band.sort(key=lambda b: b[0])
-                combined = " ".join(b[3].replace("\n", " ").strip() for b in band).lower()
-                if all(tok in combined for tok in tokens):
-                    lines = []
-                    for _, _, _, blk in band:
-                        for ln in blk.splitlines():
-                            ln = ln.strip()
-                            if ln:
-                                lines.append(ln)
-                    key = (page.number + 1, tuple(lines))
-                    if key not in seen:
-                        seen.add(key)
-                        out.append((page.number + 1, lines))
-
-    doc.close()
     return out
 
 def format_output_entries(entries):
@@ -121,13 +450,20 @@ def format_output_entries(entries):
         output.append(case_text)
     return output
 
-def validate_date(date_str):
-    """Validate date format DDMMYYYY."""
+def parse_date(date_str):
+    """Parse a DDMMYYYY string into a datetime, or return None if invalid."""
+    m = DATE_RE.fullmatch(date_str)
+    if not m:
+        return None
+    day, month, year = map(int, m.groups())
     try:
-        datetime.strptime(date_str, "%d%m%Y")
-        return True
+        return datetime(year, month, day)
     except ValueError:
-        return False
+        return None
+
+def validate_date(date_str):
+    """Validate date format DDMMYYYY."""
+    return parse_date(date_str) is not None
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -186,7 +522,9 @@ def fetch_cause_list():
         # Fetch and process data
         try:
             pdf_bytes = fetch_pdf_bytes(date, side, base_url)
-            entries = extract_rows_from_bytes(pdf_bytes, advocate)
+            # Like the downloads, only the court website's PDFs are cached
+            entries = extract_rows_from_bytes(pdf_bytes, advocate,
+                                              cache=(base_url == DEFAULT_BASE_URL))
 
             # Format response
             response = {
@@ -257,4 +595,9 @@ if __name__ == '__main__':
     print(f"🚀 Starting High Court Cause List API on port {port}")
     print(f"📋 API Key: {'Set' if API_KEY != 'your-secret-api-key-here' else 'Using default (change for production)'}")
 
-    app.run(host='0.0.0.0', port=port, debug=debug_mode)
+    if debug_mode:
+        app.run(host='0.0.0.0', port=port, debug=True)
+    else:
+        from waitress import serve
+        print(f"🧵 Serving with waitress ({WSGI_THREADS} threads)")
+        serve(app, host='0.0.0.0', port=port, threads=WSGI_THREADS)
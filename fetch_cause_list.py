@@ -14,6 +14,7 @@ Arguments:
 Options:
     --output-html FILE    Output HTML file path (default: output.html)
     --y-tolerance NUM     Y-axis tolerance for text extraction (default: 3)
+    --no-pdftotext        Parse every page with PyMuPDF instead of probing with pdftotext
     --help               Show this help message
 
 Examples:
@@ -21,24 +22,86 @@ Examples:
     python fetch_cause_list_generic.py 15052025 "Original Side" "John Doe" "https://www.calcuttahighcourt.gov.in" --output-html report.html
 """
 
-import subprocess
+import ahocorasick
 import fitz    # PyMuPDF
 import html
 import sys
 import argparse
+import os
+import re
+import shutil
+import subprocess
+import time
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
 # ─── DEFAULT CONFIG ────────────────────────────────────────────────────────
 DEFAULT_BASE_URL = "https://www.calcuttahighcourt.gov.in"
 DEFAULT_OUTPUT_HTML = "output.html"
 DEFAULT_Y_TOLERANCE = 3
+PARSE_WORKERS = min(8, os.cpu_count() or 1)
+PARALLEL_MIN_PAGES = 32
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 30  # seconds for the whole download
+MAX_PDF_BYTES = 64 * 1024 * 1024  # refuse larger downloads
+HAS_PDFTOTEXT = shutil.which("pdftotext") is not None
+# Positioned text only: ligatures are expanded, image blocks are left out
+TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
 # ──────────────────────────────────────────────────────────────────────────
 
+# Fixed-width DDMMYYYY; cheaper than datetime.strptime
+DATE_RE = re.compile(r"(\d{2})(\d{2})(\d{4})", re.ASCII)
+
 SIDE_INFO = {
     "Original Side":  ("OS", "clo"),
     "Appellate Side": ("AS", "cla"),
 }
 
+# Shared HTTP session (connection pooling, no curl subprocess per download)
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+SESSION = requests.Session()
+SESSION.verify = False
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+
+def _download(url):
+    """
+    Stream url into a buffer preallocated from its Content-Length.
+
+    The announced length is untrusted (base_url may point anywhere), so the
+    preallocation and the body are both capped at MAX_PDF_BYTES. requests'
+    timeout only bounds each socket read, so the whole body is also held to
+    a DOWNLOAD_TIMEOUT deadline.
+    """
+    deadline = time.monotonic() + DOWNLOAD_TIMEOUT
+    with SESSION.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT, allow_redirects=True) as resp:
+        size = min(int(resp.headers.get('content-length') or 0), MAX_PDF_BYTES)
+        buf = bytearray(size)
+        off = 0
+        while True:
+            if time.monotonic() > deadline:
+                raise requests.Timeout("PDF download timeout")
+            # read1 returns what has arrived instead of waiting for a full
+            # chunk, so a server that trickles bytes can't outlast the deadline
+            chunk = resp.raw.read1(DOWNLOAD_CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                break
+            end = off + len(chunk)
+            if end > MAX_PDF_BYTES:
+                raise requests.RequestException(f"response exceeds {MAX_PDF_BYTES} bytes")
+            if end <= size:
+                buf[off:end] = chunk  # same-length slice: in-place copy
+            else:
+                buf[off:] = chunk     # missing/understated length: grow
+            off = end
+        del buf[off:]
+    return bytes(buf)
+
 def fetch_pdf_bytes(date_str, side, base_url):
     """Fetch PDF bytes from the court website."""
     if side not in SIDE_INFO:
@@ -49,11 +112,8 @@ def fetch_pdf_bytes(date_str, side, base_url):
     
     print(f"⬇ Fetching PDF… {url}", file=sys.stderr)
     try:
-        data = subprocess.check_output(
-            ["curl", "--insecure", "-L", url],
-            stderr=subprocess.DEVNULL
-        )
-    except subprocess.CalledProcessError as e:
+        data = _download(url)
+    except requests.RequestException as e:
         print(f"❌ Failed to download PDF: {e}", file=sys.stderr)
         sys.exit(1)
     
@@ -63,57 +123,180 @@ def fetch_pdf_bytes(date_str, side, base_url):
     
     return data
 
-def extract_rows_from_bytes(pdf_bytes, lawyer, tol=DEFAULT_Y_TOLERANCE):
-    """Extract relevant rows from PDF bytes containing the lawyer's name."""
-    tokens = [w.lower() for w in lawyer.split()]
+def _split_blocks(raw):
+    """
+    Turn get_text("blocks") output into [(x0, y0, x1, y1, lines), ...], with
+    each block's lines stripped at the ends (inner spacing is kept as printed)
+    and empty ones dropped.
+    """
+    return [(b[0], b[1], b[2], b[3], tuple([ln for ln in map(str.strip, b[4].splitlines()) if ln]))
+            for b in raw]
+
+def _extract_page_blocks(pdf_bytes, page_indices):
+    """Return the text blocks of the given pages as split by _split_blocks."""
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        return [_split_blocks(doc.load_page(i).get_text("blocks", flags=TEXT_FLAGS, sort=False))
+                for i in page_indices]
+    finally:
+        doc.close()
+
+def _extract_blocks(pdf_bytes, page_indices):
+    """Return the text blocks of the given pages.
+
+    PyMuPDF is not thread-safe, so many pages are split into chunks and
+    extracted in separate processes.
+    """
+    if PARSE_WORKERS <= 1 or len(page_indices) < PARALLEL_MIN_PAGES:
+        return _extract_page_blocks(pdf_bytes, page_indices)
+
+    step = -(-len(page_indices) // PARSE_WORKERS)
+    with ProcessPoolExecutor(max_workers=PARSE_WORKERS) as executor:
+        futures = [executor.submit(_extract_page_blocks, pdf_bytes, page_indices[i:i + step])
+                   for i in range(0, len(page_indices), step)]
+        return [blocks for future in futures for blocks in future.result()]
+
+def _pdftotext_pages(pdf_bytes, page_count):
+    """Return the lowercased text of every page via pdftotext, or None on failure."""
+    try:
+        result = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", "-", "-"],
+            input=pdf_bytes, capture_output=True, timeout=60, check=True
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    # Every page is terminated by a form feed
+    texts = result.stdout.decode("utf-8", "replace").lower().split("\f")[:-1]
+    return texts if len(texts) == page_count else None
+
+def _build_automaton(tokens):
+    """Compile the name tokens into an Aho-Corasick automaton (value = token bit)."""
+    automaton = ahocorasick.Automaton()
+    for bit, tok in enumerate(tokens):
+        automaton.add_word(tok, 1 << bit)
+    automaton.make_automaton()
+    return automaton
+
+def _token_mask(automaton, text):
+    """OR together the bits of every token occurring in text."""
+    mask = 0
+    for _, bit in automaton.iter(text):
+        mask |= bit
+    return mask
+
+def _token_masks(automaton, lowers):
+    """
+    Scan the blocks' lowercased texts as one newline-joined buffer and return
+    (page_mask, block_masks), the OR of the token bits found on the page and
+    within each block.
+    """
+    starts = []
+    offset = 0
+    for lower in lowers:
+        starts.append(offset)
+        offset += len(lower) + 1
+
+    masks = [0] * len(lowers)
+    page_mask = 0
+    for end, bit in automaton.iter("\n".join(lowers)):
+        # Tokens hold no whitespace, so a hit never crosses a block boundary
+        masks[bisect_right(starts, end) - 1] |= bit
+        page_mask |= bit
+    return page_mask, masks
+
+def extract_rows_from_bytes(pdf_bytes, lawyer, tol=DEFAULT_Y_TOLERANCE, use_pdftotext=HAS_PDFTOTEXT):
+    """Extract relevant rows from PDF bytes containing the lawyer's name.
+
+    With use_pdftotext, pages are first probed with Poppler's pdftotext and
+    PyMuPDF only extracts the pages that contain every name token.
+    """
+    tokens = {w.lower() for w in lawyer.split()}
+    if not tokens:
+        return []
+    automaton = _build_automaton(tokens)
+    full = (1 << len(tokens)) - 1
     seen = set()
     out = []
 
-    for page in doc:
-        raw = page.get_text("blocks")
-        blocks = [(b[0], b[1], b[2], b[3], b[4]) for b in raw]
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    page_count = doc.page_count
+    doc.close()
+    texts = _pdftotext_pages(pdf_bytes, page_count) if use_pdftotext else None
+    if texts is None:
+        candidates = list(range(page_count))
+    else:
+        candidates = [i for i, text in enumerate(texts)
+                      if _token_mask(automaton, text) == full]
+
+    for page_idx, blocks in zip(candidates, _extract_blocks(pdf_bytes, candidates)):
+        page_num = page_idx + 1
+        # One pass over the page gives every block's token bitmask; a band
+        # holds every token iff its masks OR to `full`. A band never spans
+        # pages, so skip pages that lack any of the tokens.
+        lowers = ["\n".join(b[4]).lower() for b in blocks]
+        page_mask, masks = _token_masks(automaton, lowers)
+        if page_mask != full:
+            continue
+
+        # Sort block indices by vertical midpoint once per page; each band
+        # is then a contiguous slice found by bisection.
+        midys = [(b[1] + b[3]) / 2 for b in blocks]
+        order = sorted(range(len(blocks)), key=midys.__getitem__)
+        sorted_midys = [midys[i] for i in order]
 
-        for x0, y0, x1, y1, text in blocks:
-            lower = text.lower()
-            if any(tok in lower for tok in tokens):
+        # Seeds that select the same slice of the midpoint order produce the
+        # same band, so collect each distinct (lo, hi) once, in seed order,
+        # then check and emit every band a single time.
+        bands = {}
+        for idx, (x0, y0, x1, y1, _) in enumerate(blocks):
+            if masks[idx]:
                 height = y1 - y0
                 top    = y0 - tol
                 bottom = y1 + height + tol
+                bands[(bisect_left(sorted_midys, top), bisect_right(sorted_midys, bottom))] = None
 
-                band = []
-                for bx0, by0, bx1, by1, btext in blocks:
-                    midy = (by0 + by1) / 2
-                    if top <= midy <= bottom:
-                        band.append((bx0, by0, by1, btext))
-
-                band.sort(key=lambda b: b[0])
-                combined = " ".join(b[3].replace("\n"," ").strip() for b in band).lower()
-                if all(tok in combined for tok in tokens):
-                    lines = []
-                    for _,_,_,blk in band:
-                        for ln in blk.splitlines():
-                            ln = ln.strip()
-                            if ln:
-                                lines.append(ln)
-                    key = (page.number+1, tuple(lines))
-                    if key not in seen:
-                        seen.add(key)
-                        out.append((page.number+1, lines))
+        for lo, hi in bands:
+            hit = 0
+            for i in order[lo:hi]:
+                hit |= masks[i]
+                if hit == full:
+                    break
+            if hit != full:
+                continue
+
+            band_ids = sorted(order[lo:hi], key=lambda i: (blocks[i][0], i))
+            lines = []
+            for i in band_ids:
+                lines.extend(blocks[i][4])
+            key = (page_num, tuple(lines))
+            if key not in seen:
+                seen.add(key)
+                out.append((page_num, lines))
     return out
 
-def format_header_date(date_str):
-    """Format date string for the header."""
+def parse_date(date_str):
+    """Parse a DDMMYYYY string into a datetime, or return None if invalid."""
+    m = DATE_RE.fullmatch(date_str)
+    if not m:
+        return None
+    day, month, year = map(int, m.groups())
     try:
-        dt = datetime.strptime(date_str, "%d%m%Y")
-        day = dt.day
-        if 11 <= day <= 13:
-            suffix = 'th'
-        else:
-            suffix = {1:'st',2:'nd',3:'rd'}.get(day%10, 'th')
-        return dt.strftime(f"%A, {day}{suffix} of %B, %Y")
+        return datetime(year, month, day)
     except ValueError:
+        return None
+
+def format_header_date(date_str):
+    """Format date string for the header."""
+    dt = parse_date(date_str)
+    if dt is None:
         return f"Date: {date_str}"
+    day = dt.day
+    if 11 <= day <= 13:
+        suffix = 'th'
+    else:
+        suffix = {1:'st',2:'nd',3:'rd'}.get(day%10, 'th')
+    return dt.strftime(f"%A, {day}{suffix} of %B, %Y")
 
 def generate_html(entries, advocate, date_str, side):
     """Generate HTML report from extracted entries."""
@@ -190,6 +373,8 @@ Examples:
     parser.add_argument('--y-tolerance', metavar='NUM', type=int,
                         default=DEFAULT_Y_TOLERANCE,
                         help=f'Y-axis tolerance for text extraction (default: {DEFAULT_Y_TOLERANCE})')
+    parser.add_argument('--no-pdftotext', action='store_true',
+                        help='Parse every page with PyMuPDF instead of probing pages with pdftotext first')
     
     return parser.parse_args()
 
@@ -198,9 +383,7 @@ def main():
     args = parse_arguments()
     
     # Validate date format
-    try:
-        datetime.strptime(args.date, "%d%m%Y")
-    except ValueError:
+    if parse_date(args.date) is None:
         print(f"❌ Invalid date format '{args.date}'. Expected DDMMYYYY format.", file=sys.stderr)
         sys.exit(1)
     
@@ -208,7 +391,8 @@ def main():
     pdf_bytes = fetch_pdf_bytes(args.date, args.side, args.base_url)
     
     # Extract entries
-    entries = extract_rows_from_bytes(pdf_bytes, args.advocate, args.y_tolerance)
+    entries = extract_rows_from_bytes(pdf_bytes, args.advocate, args.y_tolerance,
+                                      use_pdftotext=HAS_PDFTOTEXT and not args.no_pdftotext)
     
     if not entries:
         print(f"❌ No entries found for '{args.advocate}'", file=sys.stderr)
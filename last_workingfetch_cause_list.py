@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
-import subprocess
 import fitz    # PyMuPDF
 import html
 import sys
 from datetime import datetime
 
+import requests
+import urllib3
+
 # ─── CONFIG ────────────────────────────────────────────────────────────────
 DATE_DDMMYYYY = "23052025"             # DDMMYYYY
 SIDE          = "Appellate Side"       # "Original Side" or "Appellate Side"
@@ -18,6 +20,10 @@ SIDE_INFO = {
     "Appellate Side": ("AS", "cla"),
 }
 
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+SESSION = requests.Session()
+SESSION.verify = False
+
 def fetch_pdf_bytes(date_str, side):
     code, prefix = SIDE_INFO[side]
     url = (
@@ -25,10 +31,7 @@ def fetch_pdf_bytes(date_str, side):
         f"/downloads/old_cause_lists/{code}/{prefix}{date_str}.pdf"
     )
     print(f"⬇ Fetching PDF… {url}", file=sys.stderr)
-    data = subprocess.check_output(
-        ["curl", "--insecure", "-L", url],
-        stderr=subprocess.DEVNULL
-    )
+    data = SESSION.get(url, timeout=30, allow_redirects=True).content
     if not data.startswith(b"%PDF"):
         print("❌ Failed to fetch a valid PDF", file=sys.stderr)
         sys.exit(1)
